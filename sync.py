@@ -1,30 +1,152 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import io
 import os
 import re
+import sys
 import json
 import time
+import functools
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple, Set
+from types import MappingProxyType
+from typing import List, Dict, Iterable, Iterator, Optional, TextIO, Tuple, Set
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 
+try:
+    import orjson
+except ImportError:  # orjson 是可选依赖，未安装时回退到标准库 json
+    orjson = None
 
-CODE_EXTS = {'.cpp', '.py', '.java', '.js', '.go', '.c', '.cs', '.rb', '.swift', '.kt', '.rs', '.php', '.ts'}
+
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+CODE_EXTS = frozenset({'.cpp', '.py', '.java', '.js', '.go', '.c', '.cs', '.rb', '.swift', '.kt', '.rs', '.php', '.ts'})
+
+# LeetCode 语言标识 -> 文件扩展名（只读）
+LANG_EXT_MAP = MappingProxyType({
+    "cpp": "cpp", "c++": "cpp",
+    "java": "java",
+    "python": "py", "python3": "py",
+    "javascript": "js", "typescript": "ts",
+    "golang": "go", "go": "go",
+    "rust": "rs",
+    "c": "c",
+    "csharp": "cs", "c#": "cs",
+    "ruby": "rb",
+    "swift": "swift",
+    "kotlin": "kt",
+    "scala": "scala",
+    "php": "php",
+})
+
+
+def json_loads(data: bytes):
+    """解析 JSON（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> bytes:
+    """序列化为缩进 2 格的 UTF-8 JSON（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# 注释最后一行被视为文件名时允许的扩展名（小写，不含点）
+FILENAME_EXTS = frozenset({
+    "cpp", "java", "py", "js", "go", "c", "cs", "rb", "swift", "kt", "rs", "php", "ts", "txt", "md",
+})
+
+# 注释解析 / 路径清理用到的正则（模块加载时预编译，避免每次调用重新查缓存）
+# 注释行用 fullmatch 匹配；正文捕获以非空白结尾，空注释时 group(2) 为 None
+COMMENT_LINE_RE = re.compile(r"\s*(//|#)\s*(.*\S)?\s*")
+CODE_EXT_SUFFIX_RE = re.compile(r"\.(cpp|java|py|js|go|c|cs|rb|swift|kt|rs|php|ts)$", re.IGNORECASE)
+
+# 路径组件中需要删除的非法字符（<>:"/\|?* 与控制字符），供 str.translate 使用
+ILLEGAL_PATH_CHARS_TABLE = dict.fromkeys([*map(ord, '<>:"/\\|?*'), *range(0x20)])
+
+# README 中的“最后更新”时间戳；比较 README 是否变化时忽略它
+README_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} \(北京时间\)")
+
+# 目录结构注释只在文件开头，解析时最多扫描这么多字符 / 行
+HEADER_SCAN_CHARS = 4096
+HEADER_MAX_LINES = 20
+
+# 并发拉取提交详情的线程数（不宜过大，避免触发 LeetCode 限流）
+DETAIL_WORKERS = 8
+
+# 默认请求速率：每 10 秒最多 20 次（收到 X-RateLimit-* 响应头后会自动校准）
+RATE_LIMIT = (20, 10.0)
+
+# 请求被限流（403 / 429）时的指数退避：(起始秒数, 最长秒数)，连续限流超过次数上限则放弃；
+# 提交列表与提交详情共用
+THROTTLE_BACKOFF = (1.0, 60.0)
+THROTTLE_MAX_RETRIES = 6
+
+
+class RateLimiter:
+    """线程安全的令牌桶限流器：允许短时突发，长期平均不超过 max_rate 次 / time_period 秒"""
+
+    def __init__(self, max_rate: int, time_period: float):
+        self.max_rate = max_rate
+        self._base_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_rate, self._tokens + (now - self._last) * self.max_rate / self.time_period)
+        self._last = now
+
+    def acquire(self):
+        """取走一个令牌，桶空时阻塞到下一个令牌生成"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.time_period / self.max_rate
+            time.sleep(wait)
+
+    def calibrate(self, headers):
+        """根据响应头 X-RateLimit-Limit / X-RateLimit-Remaining 校准速率"""
+        try:
+            limit = headers.get("X-RateLimit-Limit")
+            remaining = headers.get("X-RateLimit-Remaining")
+            with self._lock:
+                # Limit 的时间窗口未知（可能是每分钟 / 每小时），只允许它把速率调低，绝不超过默认值
+                if limit and int(limit) > 0:
+                    self.max_rate = min(self._base_rate, int(limit))
+                if remaining is not None:
+                    self._tokens = min(self._tokens, float(remaining))
+        except (TypeError, ValueError):
+            pass
 
 
 class LeetCodeSyncer:
-    def __init__(self, sync_after: Optional[str] = None, debug: bool = False):
+    def __init__(self, sync_after: Optional[str] = None, debug: bool = False, workers: int = DETAIL_WORKERS):
         """
         初始化同步器
 
         Args:
             sync_after: 只同步此时间之后的提交，格式: "2026-01-26 23:47" (北京时间)
             debug: 是否启用调试模式
+            workers: 并发拉取提交详情的线程数
         """
         self.debug = debug
+        self.workers = max(1, workers)
 
         # 优先使用 LeetCode CN
         self.use_cn = bool(os.getenv("LEETCODE_CN_SESSION"))
@@ -45,6 +167,24 @@ class LeetCodeSyncer:
 
         self.session = requests.Session()
 
+        # 连接池需容纳全部并发线程；瞬时错误（连接失败 / 5xx）由 urllib3 自动退避重试，
+        # 重试用尽后返回最后一次响应而不是抛异常。限流（403 / 429）不交给 urllib3：
+        # 它的重试绕过 RateLimiter，统一由 _get 退避处理
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=max(20, self.workers),
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=["GET"],
+                # 否则带 Retry-After 的 429 仍会被 urllib3 自行重试
+                respect_retry_after_header=False,
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("https://", adapter)
+
         # 注意：LeetCode 的会话 cookie 名通常都是 LEETCODE_SESSION（CN/Global 都是）
         self.session.cookies.set("LEETCODE_SESSION", self.session_cookie)
         if self.csrf_token:
@@ -59,19 +199,46 @@ class LeetCodeSyncer:
         if self.csrf_token:
             self.session.headers["X-CSRFToken"] = self.csrf_token
 
+        self.limiter = RateLimiter(*RATE_LIMIT)
+
+        # .synced_submissions.json 只保存同步时间等元信息；
+        # 已同步的提交 ID 追加写入 .synced_submissions.log（每行一个）
         self.synced_file = Path(".synced_submissions.json")
+        self.synced_log = Path(".synced_submissions.log")
+        self._pending_ids: List[str] = []
+        self._sync_log: Optional[TextIO] = None
+        self.sync_state: Dict = self._load_sync_state()
         self.synced_ids: Set[str] = self.load_synced_ids()
 
+        # 提交列表第一页的 ETag，用于下次条件请求
+        self.listing_etag: Optional[str] = self.sync_state.get("listing_etag")
+        self.listing_not_modified = False
+        # 本次拿到的 ETag 先暂存：只有列表完整拉完、详情全部成功时才替换 listing_etag 落盘
+        self.fetched_etag: Optional[str] = None
+        self.listing_complete = True
+        # 上次运行列表不完整或有提交失败：那些提交可能在更早的分页里，本次不走 ETag / 整页已同步捷径
+        self.pending_failures: bool = bool(self.sync_state.get("pending_failures"))
+
         # 记录本次新增题目（用于生成 commit msg）
         self.new_problems: List[Dict] = []
 
+        # 主线程处理单条提交时的输出目标（None 即 sys.stdout）；只在主线程读写，线程池不会用到
+        self._out: Optional[TextIO] = None
+
+        # 本次运行中已确认存在的目录，同一目录只 mkdir 一次
+        self._created_dirs: Set[str] = set()
+
+        # 本次运行中有文件写入 / 删除的目录，只为这些目录重新生成分类 README
+        self.touched_dirs: Set[str] = set()
+
         if self.debug:
             print("🐛 调试模式已启用")
 
-        # 设置时间过滤
+        # 设置时间过滤（显式传入 --after 时属于回溯补同步，不走 ETag / 整页已同步等增量捷径）
+        self.explicit_after = bool(sync_after)
         self.sync_after_timestamp = self._parse_sync_after_time(sync_after)
         if self.sync_after_timestamp:
-            dt = datetime.fromtimestamp(self.sync_after_timestamp, tz=timezone(timedelta(hours=8)))
+            dt = datetime.fromtimestamp(self.sync_after_timestamp, tz=BEIJING_TZ)
             print(f"⏰ 只同步 {dt.strftime('%Y-%m-%d %H:%M:%S')} (北京时间) 之后的提交")
 
     # -------------------- time / state --------------------
@@ -83,62 +250,139 @@ class LeetCodeSyncer:
 
         try:
             dt = datetime.strptime(time_str, "%Y-%m-%d %H:%M")
-            dt = dt.replace(tzinfo=timezone(timedelta(hours=8)))
+            dt = dt.replace(tzinfo=BEIJING_TZ)
             return int(dt.timestamp())
         except Exception as e:
             print(f"⚠️  时间格式解析失败 '{time_str}': {e}")
             return None
 
+    def _load_sync_state(self) -> Dict:
+        """读取 .synced_submissions.json（不存在或损坏时返回空字典）"""
+        if self.synced_file.exists():
+            try:
+                data = json_loads(self.synced_file.read_bytes())
+                if isinstance(data, dict):
+                    return data
+            except Exception:
+                pass
+        return {}
+
     def _get_last_sync_time(self) -> Optional[int]:
         """从配置文件获取上次同步时间"""
-        if self.synced_file.exists():
+        last_sync = self.sync_state.get("last_sync")
+        if last_sync:
             try:
-                with open(self.synced_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                last_sync = data.get("last_sync")
-                if last_sync:
-                    dt = datetime.fromisoformat(last_sync)
-                    print(f"📅 上次同步时间: {data.get('last_sync_beijing', 'Unknown')}")
-                    return int(dt.timestamp())
+                dt = datetime.fromisoformat(last_sync)
+                print(f"📅 上次同步时间: {self.sync_state.get('last_sync_beijing', 'Unknown')}")
+                return int(dt.timestamp())
             except Exception:
                 pass
         return None
 
     def load_synced_ids(self) -> Set[str]:
         """加载已同步的提交ID（字符串集合）"""
-        if self.synced_file.exists():
+        synced_ids: Set[str] = set()
+
+        if self.synced_log.exists():
             try:
-                with open(self.synced_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                synced_ids = set(map(str, data.get("synced_ids", [])))
-                if synced_ids:
-                    print(f"📦 已加载 {len(synced_ids)} 条同步记录")
-                return synced_ids
+                synced_ids.update(self.synced_log.read_text(encoding="utf-8").split())
             except Exception:
-                return set()
-        return set()
+                pass
+
+        # 兼容旧版：ID 列表曾直接存放在 JSON 中，首次保存时迁移到追加日志
+        legacy_ids = set(map(str, self.sync_state.get("synced_ids", [])))
+        if legacy_ids:
+            self._pending_ids.extend(sorted(legacy_ids - synced_ids))
+            synced_ids |= legacy_ids
+
+        if synced_ids:
+            print(f"📦 已加载 {len(synced_ids)} 条同步记录")
+        return synced_ids
+
+    def mark_synced(self, sub_id: str):
+        """标记提交为已同步，并立即追加到日志（行缓冲，中途中断也不会丢记录）"""
+        sub_id = str(sub_id)
+        self.synced_ids.add(sub_id)
+        self._pending_ids.append(sub_id)
+        self._flush_pending_ids()
+
+    def _flush_pending_ids(self):
+        """把尚未落盘的 ID 追加写入日志"""
+        if not self._pending_ids:
+            return
+        if self._sync_log is None:
+            self._sync_log = open(self.synced_log, "a", encoding="utf-8", buffering=1)
+        self._sync_log.write("\n".join(self._pending_ids) + "\n")
+        self._pending_ids.clear()
+
+    def close_sync_log(self):
+        """补写未落盘的 ID，fsync 后关闭日志"""
+        self._flush_pending_ids()
+        if self._sync_log is not None:
+            self._sync_log.flush()
+            os.fsync(self._sync_log.fileno())
+            self._sync_log.close()
+            self._sync_log = None
+
+    def save_synced_ids(self, advance_last_sync: bool = True):
+        """保存同步状态：落盘 ID 日志，并刷新同步时间（advance_last_sync=False 时沿用上次同步时间）"""
+        self.close_sync_log()
+
+        if advance_last_sync:
+            now = datetime.now(BEIJING_TZ)
+            last_sync, last_sync_beijing = now.isoformat(), now.strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            last_sync = self.sync_state.get("last_sync")
+            last_sync_beijing = self.sync_state.get("last_sync_beijing")
 
-    def save_synced_ids(self):
-        """保存已同步的提交ID"""
-        now_local = datetime.now(timezone(timedelta(hours=8)))
         payload = {
-            "synced_ids": sorted(list(self.synced_ids)),
-            "last_sync": datetime.now().isoformat(),
-            "last_sync_beijing": now_local.strftime("%Y-%m-%d %H:%M:%S"),
+            "last_sync": last_sync,
+            "last_sync_beijing": last_sync_beijing,
+            "listing_etag": self.listing_etag,
+            "pending_failures": self.pending_failures,
         }
-        with open(self.synced_file, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False)
+        self._atomic_write_json(self.synced_file, payload)
+
+    @staticmethod
+    def _atomic_write_json(path: Path, payload: Dict):
+        """先写临时文件再 os.replace 替换，写到一半被中断也不会留下损坏的 JSON"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(json_dumps(payload))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
 
     # -------------------- leetcode API --------------------
 
-    def get_ac_submissions(self) -> List[Dict]:
-        """获取所有 AC 提交记录（从 /api/submissions/ 拉分页）"""
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """经过限流器发起 GET 请求，并用响应头校准限流速率；被限流（403 / 429）时退避重试
+
+        重试用尽仍被限流时返回最后一次响应，由调用方决定如何处理。
+        """
+        backoff = THROTTLE_BACKOFF[0]
+        for attempt in range(THROTTLE_MAX_RETRIES + 1):
+            # 每次重试都重新取令牌，退避期间的请求同样计入限流
+            self.limiter.acquire()
+            resp = self.session.get(url, timeout=30, **kwargs)
+            self.limiter.calibrate(resp.headers)
+            if resp.status_code not in (403, 429) or attempt == THROTTLE_MAX_RETRIES:
+                break
+            # 优先遵循服务端给出的 Retry-After，否则按指数退避等待
+            delay = self._retry_after(resp) or backoff
+            print(f"⚠️  请求被限制 ({resp.status_code})，等待 {delay:g} 秒...")
+            time.sleep(delay)
+            backoff = min(backoff * 2, THROTTLE_BACKOFF[1])
+        return resp
+
+    def iter_ac_submissions(self) -> Iterator[List[Dict]]:
+        """逐页产出 AC 提交记录（从 /api/submissions/ 拉分页），调用方可边分页边处理"""
         print("🔍 正在获取AC提交记录...")
 
         url = f"{self.base_url}/api/submissions/"
         params = {"offset": 0, "limit": 20, "lastkey": ""}
 
-        all_submissions: List[Dict] = []
+        total = 0
         seen_ids: Set[str] = set()
         page = 0
 
@@ -148,20 +392,35 @@ class LeetCodeSyncer:
                 if self.debug:
                     print(f"  📄 获取第 {page} 页...")
 
-                resp = self.session.get(url, params=params, timeout=30)
+                # 第一页带上次记录的 ETag 做条件请求：304 说明提交列表没有任何变化
+                headers = {}
+                if (params["offset"] == 0 and self.listing_etag and self.synced_ids
+                        and not self.explicit_after and not self.pending_failures):
+                    headers["If-None-Match"] = self.listing_etag
 
-                if resp.status_code == 403:
-                    print("⚠️  请求被限制 (403)，等待5秒...")
-                    time.sleep(5)
-                    continue
+                resp = self._get(url, params=params, headers=headers)
+
+                if resp.status_code == 304:
+                    print("✨ 提交列表未变化 (304)，跳过分页")
+                    self.listing_not_modified = True
+                    break
+
+                # _get 已按退避重试过，仍被限流说明短时间内不会恢复
+                if resp.status_code in (403, 429):
+                    print(f"❌ 连续 {THROTTLE_MAX_RETRIES} 次重试仍被限制，停止获取")
+                    self.listing_complete = False
+                    break
 
                 resp.raise_for_status()
-                data = resp.json()
+                if params["offset"] == 0:
+                    self.fetched_etag = resp.headers.get("ETag")
+                data = json_loads(resp.content)
 
                 submissions = data.get("submissions_dump", [])
                 if not submissions:
                     break
 
+                page_subs: List[Dict] = []
                 should_stop = False
 
                 for sub in submissions:
@@ -176,7 +435,19 @@ class LeetCodeSyncer:
 
                     if sub.get("status_display") == "Accepted" and sub_id and sub_id not in seen_ids:
                         seen_ids.add(sub_id)
-                        all_submissions.append(sub)
+                        # 入库时缓存字符串形式的 ID，后续查重不再反复 str()
+                        sub["_id_str"] = sub_id
+                        page_subs.append(sub)
+
+                if page_subs:
+                    total += len(page_subs)
+                    yield page_subs
+
+                    # 增量同步：整页 AC 提交都已同步过，更早的分页也不会再有新提交；
+                    # 显式 --after 回溯或上次有遗留失败时，更早的分页可能还有未同步的提交，不能提前停止
+                    if not self.explicit_after and not self.pending_failures and all(sub["_id_str"] in self.synced_ids for sub in page_subs):
+                        print("⏹️  本页提交均已同步，停止获取")
+                        break
 
                 if should_stop:
                     print("⏹️  已到达时间截止点，停止获取")
@@ -187,139 +458,100 @@ class LeetCodeSyncer:
 
                 params["offset"] += params["limit"]
                 params["lastkey"] = str(submissions[-1].get("id", ""))
-                time.sleep(1)
 
             except Exception as e:
                 print(f"❌ 获取提交记录出错: {e}")
+                self.listing_complete = False
                 break
 
-        print(f"✅ 共获取到 {len(all_submissions)} 条AC提交记录")
-        return all_submissions
+        print(f"✅ 共获取到 {total} 条AC提交记录")
+
+    @staticmethod
+    def _retry_after(resp: requests.Response) -> Optional[float]:
+        """解析 Retry-After 响应头（秒数形式），缺失或无法解析时返回 None"""
+        value = resp.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
 
     def get_submission_detail(self, submission_id: str) -> Optional[Dict]:
         """获取提交详情（包含代码）"""
         url = f"{self.base_url}/api/submissions/{submission_id}/"
-        for retry in range(3):
-            try:
-                resp = self.session.get(url, timeout=30)
-                resp.raise_for_status()
-                return resp.json()
-            except Exception as e:
-                if retry < 2:
-                    time.sleep(2)
-                    continue
-                if self.debug:
-                    print(f"  ❌ 获取详情失败: {e}")
-                return None
+        try:
+            resp = self._get(url)
+            resp.raise_for_status()
+            return json_loads(resp.content)
+        except Exception as e:
+            if self.debug:
+                print(f"  ❌ 获取详情失败: {e}")
+            return None
 
     # -------------------- comment parsing --------------------
 
-    def has_valid_comment(self, code: str) -> bool:
-        """检查代码是否包含有效的目录结构注释"""
+    def parse_comment(self, code: str) -> Tuple[Optional[List[str]], Optional[str]]:
+        """解析代码开头的目录结构注释，返回 (目录层级, 文件名)；格式不合法时返回 (None, None)"""
         if not code:
-            return False
+            return None, None
+
+        # 目录注释只会出现在文件开头：只切分前 HEADER_SCAN_CHARS 个字符里的前 HEADER_MAX_LINES 行
+        head = code.lstrip()[:HEADER_SCAN_CHARS]
+        lines = head.split("\n", HEADER_MAX_LINES)[:HEADER_MAX_LINES]
+
+        m = COMMENT_LINE_RE.fullmatch(lines[0])
+        if not m:
+            if self.debug:
+                print("  ❌ 第一行不是注释", file=self._out)
+            return None, None
+        comment_prefix = m.group(1)
 
-        lines = code.strip().split("\n")
         if len(lines) < 2:
-            return False
+            return None, None
 
         if self.debug:
-            print("  📝 代码前10行:")
+            print("  📝 代码前10行:", file=self._out)
             for i in range(min(10, len(lines))):
-                print(f"     {i+1}: {lines[i][:100]}")
-
-        first = lines[0].strip()
-        if first.startswith("//"):
-            comment_prefix = "//"
-        elif first.startswith("#"):
-            comment_prefix = "#"
-        else:
-            if self.debug:
-                print("  ❌ 第一行不是注释")
-            return False
+                print(f"     {i+1}: {lines[i][:100]}", file=self._out)
 
         comment_lines: List[str] = []
         for line in lines:
-            stripped = line.strip()
-            if stripped.startswith(comment_prefix):
-                content = stripped[len(comment_prefix):].strip()
-                if content:
-                    comment_lines.append(content)
-            else:
+            m = COMMENT_LINE_RE.fullmatch(line)
+            if not m or m.group(1) != comment_prefix:
                 break
+            if m.group(2):
+                comment_lines.append(m.group(2))
 
         if self.debug:
-            print(f"  📋 找到 {len(comment_lines)} 行连续注释:")
+            print(f"  📋 找到 {len(comment_lines)} 行连续注释:", file=self._out)
             for i, line in enumerate(comment_lines, 1):
-                print(f"     {i}: {line}")
+                print(f"     {i}: {line}", file=self._out)
 
         if len(comment_lines) < 2:
             if self.debug:
-                print("  ❌ 注释行数不足（需要至少2行）")
-            return False
-
-        last_line = comment_lines[-1]
-        if not self._looks_like_filename(last_line):
-            if self.debug:
-                print(f"  ❌ 最后一行不像文件名: {last_line}")
-            return False
-
-        directories = comment_lines[:-1]
-        for i, dir_name in enumerate(directories, 1):
-            if self._looks_like_filename(dir_name):
-                if self.debug:
-                    print(f"  ❌ 第{i}行看起来像文件名而不是目录: {dir_name}")
-                return False
-            if len(dir_name) < 2 or len(dir_name) > 100:
-                if self.debug:
-                    print(f"  ❌ 第{i}行长度不合法: {dir_name}")
-                return False
-
-        if self.debug:
-            print(f"  ✅ 验证通过: {len(directories)} 级目录")
-        return True
-
-    def parse_comment(self, code: str) -> Tuple[Optional[List[str]], Optional[str]]:
-        """解析代码注释，提取目录结构和文件名"""
-        if not code:
-            return None, None
-
-        lines = code.strip().split("\n")
-        if len(lines) < 2:
-            return None, None
-
-        first = lines[0].strip()
-        if first.startswith("//"):
-            comment_prefix = "//"
-        elif first.startswith("#"):
-            comment_prefix = "#"
-        else:
-            return None, None
-
-        comment_lines: List[str] = []
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith(comment_prefix):
-                content = stripped[len(comment_prefix):].strip()
-                if content:
-                    comment_lines.append(content)
-            else:
-                break
-
-        if len(comment_lines) < 2:
+                print("  ❌ 注释行数不足（需要至少2行）", file=self._out)
             return None, None
 
         filename = comment_lines[-1]
         if not self._looks_like_filename(filename):
+            if self.debug:
+                print(f"  ❌ 最后一行不像文件名: {filename}", file=self._out)
             return None, None
 
         directories = comment_lines[:-1]
-        for dir_name in directories:
+        for i, dir_name in enumerate(directories, 1):
             if self._looks_like_filename(dir_name):
+                if self.debug:
+                    print(f"  ❌ 第{i}行看起来像文件名而不是目录: {dir_name}", file=self._out)
                 return None, None
             if len(dir_name) < 2 or len(dir_name) > 100:
+                if self.debug:
+                    print(f"  ❌ 第{i}行长度不合法: {dir_name}", file=self._out)
                 return None, None
 
+        if self.debug:
+            print(f"  ✅ 验证通过: {len(directories)} 级目录", file=self._out)
         return directories, filename
 
     def _looks_like_filename(self, text: str) -> bool:
@@ -328,11 +560,12 @@ class LeetCodeSyncer:
             return True
 
         # 有扩展名
-        if re.search(r"\.(cpp|java|py|js|go|c|cs|rb|swift|kt|rs|php|ts|txt|md)$", text, re.IGNORECASE):
+        dot = text.rfind(".")
+        if dot != -1 and text[dot + 1:].lower() in FILENAME_EXTS:
             return True
 
         # 以 123. 开头
-        if re.match(r"^\d+\.", text):
+        if self.extract_problem_id(text):
             return True
 
         # 像 “xxx-yyy-zzz”
@@ -345,28 +578,15 @@ class LeetCodeSyncer:
 
     def get_file_extension(self, lang: str) -> str:
         """根据语言获取文件扩展名"""
-        ext_map = {
-            "cpp": "cpp", "c++": "cpp",
-            "java": "java",
-            "python": "py", "python3": "py",
-            "javascript": "js", "typescript": "ts",
-            "golang": "go", "go": "go",
-            "rust": "rs",
-            "c": "c",
-            "csharp": "cs", "c#": "cs",
-            "ruby": "rb",
-            "swift": "swift",
-            "kotlin": "kt",
-            "scala": "scala",
-            "php": "php",
-        }
-        return ext_map.get((lang or "").lower(), "txt")
+        return LANG_EXT_MAP.get((lang or "").lower(), "txt")
 
-    def sanitize_path_component(self, name: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def sanitize_path_component(name: str) -> str:
         """清理路径组件，移除非法字符"""
         if not name:
             return "untitled"
-        name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', "", name)
+        name = name.translate(ILLEGAL_PATH_CHARS_TABLE)
         name = name.strip(". \t\n\r")
         if not name:
             return "untitled"
@@ -374,65 +594,71 @@ class LeetCodeSyncer:
             name = name[:100]
         return name
 
-    def extract_title_from_filename(self, filename: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def extract_title_from_filename(filename: str) -> str:
         """从注释中的文件名提取题目名称"""
-        title = re.sub(r"\.(cpp|java|py|js|go|c|cs|rb|swift|kt|rs|php|ts)$", "", filename, flags=re.IGNORECASE)
+        title = CODE_EXT_SUFFIX_RE.sub("", filename)
         return title.strip()
 
     def extract_problem_id(self, title: str) -> Optional[str]:
-        """提取题号"""
-        m = re.match(r"^(\d+)\.", title)
-        return m.group(1) if m else None
-
-    def delete_old_versions(self, dir_path: Path, title_pattern: str, current_file: Path):
-        """删除同一题目的旧版本文件（按题号匹配）"""
-        if not dir_path.exists():
-            return
-        m = re.match(r"^(\d+)\.", title_pattern)
-        if not m:
-            return
-
-        problem_id = m.group(1)
+        """提取题号（标题开头 “123.” 中的数字）"""
+        # 每个文件名都会调用：partition + isdecimal 即可，无需进入正则引擎
+        head, sep, _ = title.partition(".")
+        return head if sep and head.isdecimal() else None
+
+    def delete_old_versions(self, dir_path: str, title_pattern: str, current_name: str) -> int:
+        """删除同一题目的旧版本文件（按题号匹配，current_name 为要保留的文件名），返回删除数量"""
+        if not os.path.isdir(dir_path):
+            return 0
+        problem_id = self.extract_problem_id(title_pattern)
+        if not problem_id:
+            return 0
+
+        prefix = f"{problem_id}."
         deleted_count = 0
 
-        for file in dir_path.glob(f"{problem_id}.*"):
-            if file != current_file and file.is_file():
+        # 直接 scandir + 前缀比较，不为每个目录项构造 Path / 走 fnmatch
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if not entry.name.startswith(prefix) or entry.name == current_name:
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
                 try:
-                    file.unlink()
+                    os.unlink(entry.path)
                     deleted_count += 1
                     if self.debug:
-                        print(f"  🗑️  删除旧版本: {file.name}")
+                        print(f"  🗑️  删除旧版本: {entry.name}", file=self._out)
                 except Exception as e:
                     if self.debug:
-                        print(f"  ⚠️  删除失败 {file.name}: {e}")
+                        print(f"  ⚠️  删除失败 {entry.name}: {e}", file=self._out)
 
         if deleted_count > 0 and not self.debug:
-            print(f"  🗑️  删除了 {deleted_count} 个旧版本")
+            print(f"  🗑️  删除了 {deleted_count} 个旧版本", file=self._out)
+        return deleted_count
 
     # -------------------- saving submissions --------------------
 
-    def save_submission(self, submission: Dict, detail: Dict) -> bool:
-        """保存提交到本地文件"""
+    def save_submission(self, submission: Dict, detail: Dict, directories: List[str], filename: str) -> bool:
+        """保存提交到本地文件（directories / filename 为 parse_comment 的解析结果）"""
         code = detail.get("code", "")
         if not code:
             if self.debug:
-                print("  ❌ 没有代码内容")
-            return False
-
-        directories, filename = self.parse_comment(code)
-        if not directories or not filename:
-            if self.debug:
-                print("  ⊘ 跳过：没有有效的目录结构注释")
+                print("  ❌ 没有代码内容", file=self._out)
             return False
 
         safe_dirs = [self.sanitize_path_component(d) for d in directories]
-        dir_path = Path(*safe_dirs)
+        # 热路径上直接用字符串路径 + os.path，避免反复构造 Path 对象
+        dir_path = os.path.join(*safe_dirs)
 
-        try:
-            dir_path.mkdir(parents=True, exist_ok=True)
-        except Exception as e:
-            print(f"  ❌ 创建目录失败 {dir_path}: {e}")
-            return False
+        if dir_path not in self._created_dirs:
+            try:
+                os.makedirs(dir_path, exist_ok=True)
+            except Exception as e:
+                print(f"  ❌ 创建目录失败 {dir_path}: {e}", file=self._out)
+                return False
+            self._created_dirs.add(dir_path)
 
         title = self.extract_title_from_filename(filename)
         safe_title = self.sanitize_path_component(title)
@@ -441,33 +667,49 @@ class LeetCodeSyncer:
         ext = self.get_file_extension(lang)
 
         file_name = f"{safe_title}.{ext}"
-        file_path = dir_path / file_name
+        file_path = os.path.join(dir_path, file_name)
 
         if self.debug:
-            print(f"  📂 目录结构: {' / '.join(safe_dirs)}")
-            print(f"  📄 文件名: {file_name}")
-            print(f"  📍 完整路径: {file_path}")
+            print(f"  📂 目录结构: {' / '.join(safe_dirs)}", file=self._out)
+            print(f"  📄 文件名: {file_name}", file=self._out)
+            print(f"  📍 完整路径: {file_path}", file=self._out)
 
-        self.delete_old_versions(dir_path, safe_title, file_path)
+        if self.delete_old_versions(dir_path, safe_title, file_name):
+            self.touched_dirs.add(dir_path)
 
-        is_new = not file_path.exists()
+        code_bytes = code.encode("utf-8")
 
-        if file_path.exists():
+        # 一次 stat 同时得到“是否存在”和文件大小，后面比较时不再重复 stat
+        try:
+            existing_size: Optional[int] = os.stat(file_path).st_size
+        except OSError:
+            existing_size = None
+        is_new = existing_size is None
+
+        if not is_new:
             try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    existing_code = f.read()
-                if existing_code == code:
-                    print(f"  ⊙ 已存在（内容相同）: {file_path}")
-                    return True
-                else:
-                    print(f"  ♻️  更新文件: {file_path}")
+                # 大小不同必然内容不同；只有大小一致时才读出文件按字节比较
+                if existing_size == len(code_bytes):
+                    with open(file_path, "rb") as f:
+                        if f.read() == code_bytes:
+                            print(f"  ⊙ 已存在（内容相同）: {file_path}", file=self._out)
+                            return True
+                print(f"  ♻️  更新文件: {file_path}", file=self._out)
             except Exception:
                 pass
 
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(code)
-            print(f"  ✅ 已保存: {file_path}")
+            # 一次编码、直接写文件描述符，绕过 TextIOWrapper / BufferedWriter
+            # O_BINARY（仅 Windows）：避免文本模式把 LF 写成 CRLF，保证落盘字节与提交内容一致
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+            try:
+                view = memoryview(code_bytes)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+            self.touched_dirs.add(dir_path)
+            print(f"  ✅ 已保存: {file_path}", file=self._out)
 
             # 记录新增题目
             if is_new:
@@ -476,51 +718,78 @@ class LeetCodeSyncer:
                     self.new_problems.append({
                         "id": pid,
                         "title": safe_title,
-                        "path": str(file_path),
+                        "path": file_path,
                         "category": " / ".join(safe_dirs),
                     })
 
             return True
         except Exception as e:
-            print(f"  ❌ 保存失败 {file_path}: {e}")
+            print(f"  ❌ 保存失败 {file_path}: {e}", file=self._out)
             return False
 
     # -------------------- README generation --------------------
-    def generate_category_readme(self, dir_path: Path):
-        """生成分类目录的 README.md（列出该目录下的题目文件）"""
-        if not dir_path.exists() or not dir_path.is_dir():
-            return
-
-        # 收集该目录下的所有题目文件
-        problems: List[Dict[str, str]] = []
-        for file in sorted(dir_path.glob("*.*")):
-            if file.name == "README.md":
+    def _collect_dir_problems(self, file_names: Iterable[str]) -> List[Dict[str, str]]:
+        """从某个目录的文件名列表中提取题目（同题号只保留一份），按题号排序"""
+        # 以题号为键收集：同题号只保留（按文件名排序后的）第一份
+        problems: Dict[str, Dict[str, str]] = {}
+        for name in sorted(file_names):
+            if name == "README.md":
                 continue
-            if file.suffix.lower() not in [
-                ".cpp", ".py", ".java", ".js", ".go", ".c", ".cs",
-                ".rb", ".swift", ".kt", ".rs", ".php", ".ts"
-            ]:
+            title, ext = os.path.splitext(name)
+            ext = ext.lower()
+            if ext not in CODE_EXTS:
                 continue
 
-            title = file.stem
             problem_id = self.extract_problem_id(title)
             if not problem_id:
                 continue
 
-            # 去重：同题号只保留一份
-            if any(p["id"] == problem_id for p in problems):
+            if problem_id not in problems:
+                problems[problem_id] = {"id": problem_id, "title": title, "file": name, "lang": ext[1:]}
+
+        # 按题号排序
+        return sorted(problems.values(), key=lambda x: int(x["id"]))
+
+    def _scan_tree(self) -> Dict[str, List[Dict[str, str]]]:
+        """遍历一次仓库目录树，返回 {相对目录: 题目列表}，供分类 README 和主 README 共用"""
+        tree: Dict[str, List[Dict[str, str]]] = {}
+        stack = ["."]
+        while stack:
+            root = stack.pop()
+            files: List[str] = []
+            # DirEntry 自带 readdir 得到的类型信息，is_dir / is_file 通常无需额外 stat
+            try:
+                with os.scandir(root) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            # 跳过隐藏目录和 .git 等
+                            if not entry.name.startswith("."):
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            files.append(entry.name)
+            except OSError:
                 continue
 
-            problems.append({"id": problem_id, "title": title, "file": file.name})
+            problems = self._collect_dir_problems(files)
+            if problems:
+                tree[os.path.normpath(root)] = problems
+        return tree
 
-        if not problems:
+    def generate_category_readme(self, dir_path: Path, problems: Optional[List[Dict[str, str]]] = None):
+        """生成分类目录的 README.md（列出该目录下的题目文件）"""
+        if not dir_path.exists() or not dir_path.is_dir():
             return
 
-        # 按题号排序
-        problems.sort(key=lambda x: int(x["id"]))
+        # 未传入预先扫描的结果时，单独收集该目录下的所有题目文件
+        if problems is None:
+            with os.scandir(dir_path) as it:
+                problems = self._collect_dir_problems([entry.name for entry in it if entry.is_file()])
+
+        if not problems:
+            return
 
         category_name = dir_path.name
-        now_bj = datetime.now(timezone(timedelta(hours=8))).strftime("%Y-%m-%d %H:%M:%S")
+        now_bj = datetime.now(BEIJING_TZ).strftime("%Y-%m-%d %H:%M:%S")
 
         readme_content = [
             f"# {category_name}",
@@ -529,13 +798,8 @@ class LeetCodeSyncer:
             "",
             "## 📝 题目列表",
             "",
-            "| # | 题目 | 代码 |",
-            "|---|------|------|",
         ]
-
-        for p in problems:
-            readme_content.append(f"| {p['id']} | {p['title']} | [查看代码](./{p['file']}) |")
-
+        readme_content.extend(self._render_problem_table(problems))
         readme_content.extend([
             "",
             "---",
@@ -546,85 +810,78 @@ class LeetCodeSyncer:
 
         readme_path = dir_path / "README.md"
         try:
-            readme_path.write_text("\n".join(readme_content), encoding="utf-8")
-            if self.debug:
-                print(f"  📄 生成 README: {readme_path}")
+            if self._write_readme(readme_path, "\n".join(readme_content)):
+                if self.debug:
+                    print(f"  📄 生成 README: {readme_path}")
+            elif self.debug:
+                print(f"  ⊙ README 无变化: {readme_path}")
         except Exception as e:
             if self.debug:
                 print(f"  ⚠️  生成 README 失败: {e}")
 
-    def update_all_category_readmes(self):
-        """更新所有包含代码文件的目录的 README.md"""
-        print("\n📚 更新分类 README...")
+    @staticmethod
+    def _render_problem_table(problems: List[Dict[str, str]], link_prefix: str = "./") -> List[str]:
+        """渲染题目表格（表头 + 每题一行），分类 README 与主 README 共用"""
+        lines = ["| # | 题目 | 代码 |", "|---|------|------|"]
+        lines.extend(f"| {p['id']} | {p['title']} | [查看代码]({link_prefix}{p['file']}) |" for p in problems)
+        return lines
 
-        exts = (".cpp", ".py", ".java", ".js", ".go", ".c", ".cs", ".rb", ".swift", ".kt", ".rs", ".php", ".ts")
-
-        for root, dirs, files in os.walk("."):
-            root_path = Path(root)
-
-            # 跳过隐藏目录和 .git 等
-            if any(part.startswith(".") for part in root_path.parts):
-                continue
+    @staticmethod
+    def _write_readme(readme_path: Path, content: str) -> bool:
+        """写入 README；除“最后更新”时间外与现有内容一致时不写，返回是否写入"""
+        try:
+            old_content = readme_path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            old_content = None
 
-            has_code = any(f.lower().endswith(exts) for f in files)
-            if has_code:
-                self.generate_category_readme(root_path)
+        if old_content is not None and README_TIMESTAMP_RE.sub("", old_content) == README_TIMESTAMP_RE.sub("", content):
+            return False
 
-    def collect_all_problems(self) -> Dict[str, List[Dict]]:
-        """收集所有题目，按分类(目录)组织"""
-        problems_by_category: Dict[str, List[Dict]] = defaultdict(list)
+        # 一次性编码后按字节写入，不再经过文本层的编码包装
+        readme_path.write_bytes(content.encode("utf-8"))
+        return True
 
-        exts = {".cpp", ".py", ".java", ".js", ".go", ".c", ".cs", ".rb", ".swift", ".kt", ".rs", ".php", ".ts"}
+    def update_all_category_readmes(
+        self,
+        tree: Optional[Dict[str, List[Dict[str, str]]]] = None,
+        only: Optional[Set[str]] = None,
+    ):
+        """更新所有包含代码文件的目录的 README.md；传入 only 时只更新这些目录（以及还没有 README 的目录）"""
+        print("\n📚 更新分类 README...")
 
-        for root, dirs, files in os.walk("."):
-            root_path = Path(root)
+        if tree is None:
+            tree = self._scan_tree()
 
-            # 跳过隐藏目录
-            if any(part.startswith(".") for part in root_path.parts):
+        for rel_dir, problems in tree.items():
+            if only is not None and rel_dir not in only and os.path.exists(os.path.join(rel_dir, "README.md")):
                 continue
+            self.generate_category_readme(Path(rel_dir), problems)
+
+    def collect_all_problems(self, tree: Optional[Dict[str, List[Dict[str, str]]]] = None) -> Dict[str, List[Dict]]:
+        """收集所有题目，按分类(目录)组织"""
+        if tree is None:
+            tree = self._scan_tree()
 
+        problems_by_category: Dict[str, List[Dict]] = {}
+        for rel_dir, problems in tree.items():
             # 根目录不作为分类
-            if root_path == Path("."):
+            if rel_dir == ".":
                 continue
 
-            category = str(root_path).replace("\\", " / ")
-
-            for file in root_path.glob("*.*"):
-                if file.name == "README.md":
-                    continue
-                if file.suffix.lower() not in exts:
-                    continue
-
-                title = file.stem
-                problem_id = self.extract_problem_id(title)
-                if not problem_id:
-                    continue
-
-                problems_by_category[category].append({
-                    "id": problem_id,
-                    "title": title,
-                    "file": str(file.relative_to(".")).replace("\\", "/"),
-                    "lang": file.suffix.lower()[1:],
-                })
-
-        # 每个分类内：按题号排序 + 去重（同题号只保留一份）
-        for category in list(problems_by_category.keys()):
-            seen_ids: Set[str] = set()
-            unique_list: List[Dict] = []
-            for p in sorted(problems_by_category[category], key=lambda x: int(x["id"])):
-                if p["id"] in seen_ids:
-                    continue
-                seen_ids.add(p["id"])
-                unique_list.append(p)
-            problems_by_category[category] = unique_list
+            category = rel_dir.replace("\\", " / ")
+            prefix = rel_dir.replace("\\", "/")
+            problems_by_category[category] = [
+                {"id": p["id"], "title": p["title"], "file": f"{prefix}/{p['file']}", "lang": p["lang"]}
+                for p in problems
+            ]
 
-        return dict(problems_by_category)
+        return problems_by_category
 
-    def generate_main_readme(self):
+    def generate_main_readme(self, tree: Optional[Dict[str, List[Dict[str, str]]]] = None):
         """生成仓库根目录 README.md（全局统计 + 分类目录表）"""
         print("\n📖 生成主 README...")
 
-        problems_by_category = self.collect_all_problems()
+        problems_by_category = self.collect_all_problems(tree)
         if not problems_by_category:
             print("  ⚠️  没有找到任何题目")
             return
@@ -638,7 +895,7 @@ class LeetCodeSyncer:
             for p in problems:
                 lang_count[p["lang"]] += 1
 
-        now_bj = datetime.now(timezone(timedelta(hours=8))).strftime("%Y-%m-%d %H:%M:%S")
+        now_bj = datetime.now(BEIJING_TZ).strftime("%Y-%m-%d %H:%M:%S")
 
         # shields.io 徽章模板（保留你原来的逻辑）
         lang_icons = {
@@ -663,8 +920,10 @@ class LeetCodeSyncer:
                 badges.append(lang_icons[lang].format(count=count))
 
         # README 内容（彻底修复你原先的代码块/字符串错乱）
-        lines: List[str] = []
-        lines += [
+        # 题目表可能有上千行：直接写进 StringIO，不再逐行 append 到列表后整体 join
+        buf = io.StringIO()
+        write = buf.write
+        write("\n".join([
             "# 🎯 LeetCode 题解集",
             "",
             "> 自动同步的 LeetCode 刷题记录，持续更新中...",
@@ -681,23 +940,16 @@ class LeetCodeSyncer:
             "",
             "## 📚 题目分类",
             "",
-        ]
+        ]))
+        write("\n")
 
         for category in sorted(problems_by_category.keys()):
             problems = problems_by_category[category]
-            lines += [
-                f"### {category}",
-                "",
-                f"> 共 **{len(problems)}** 道题目",
-                "",
-                "| # | 题目 | 代码 |",
-                "|---|------|------|",
-            ]
-            for p in problems:
-                lines.append(f"| {p['id']} | {p['title']} | [查看代码](./{p['file']}) |")
-            lines.append("")
+            write(f"### {category}\n\n> 共 **{len(problems)}** 道题目\n\n")
+            write("\n".join(self._render_problem_table(problems)))
+            write("\n\n")
 
-        lines += [
+        write("\n".join([
             "## 🚀 使用说明",
             "",
             "### 自动同步",
@@ -729,10 +981,12 @@ class LeetCodeSyncer:
             "- ✅ 前面的行是目录层级（支持任意多级）",
             "- ✅ 使用 `//` 或 `#` 作为注释符号",
             "",
-        ]
+        ]))
 
         try:
-            Path("README.md").write_text("\n".join(lines), encoding="utf-8")
+            if not self._write_readme(Path("README.md"), buf.getvalue()):
+                print("  ⊙ 主 README 内容无变化，未重写")
+                return
             print("  ✅ 主 README 已更新")
             print(f"     - 总题数: {total_problems}")
             print(f"     - 分类数: {total_categories}")
@@ -762,89 +1016,117 @@ class LeetCodeSyncer:
         msg_lines.append(f"共 {len(self.new_problems)} 道新题目")
         return "\n".join(msg_lines)
 
-    def sync(self) -> bool:
-        """执行同步：拉取提交 -> 校验注释 -> 写文件 -> 生成 README"""
-        print("=" * 60)
-        print("🚀 开始同步 LeetCode 提交记录")
-        print("=" * 60)
-
-        submissions = self.get_ac_submissions()
-        if not submissions:
-            print("📭 没有找到 AC 提交记录")
-            return False
-
-        new_submissions = [
-            sub for sub in submissions
-            if str(sub.get("id")) not in self.synced_ids
-        ]
-
-        if not new_submissions:
-            print("✨ 没有新的提交需要同步")
-            return False
+    def _process_submission(self, index: int, total: int, submission: Dict, detail: Optional[Dict]) -> str:
+        """处理单条提交：校验注释 -> 写文件 -> 标记已同步，返回结果类型（success / skipped / failed）"""
+        sub_id = submission["_id_str"]
+        title = submission.get("title", "Unknown")
+        timestamp = submission.get("timestamp")
 
-        print(f"\n📦 共 {len(new_submissions)} 条新提交，开始检查...")
-        print("-" * 60)
-
-        success_count = 0
-        skipped_count = 0
-        failed_count = 0
-
-        for i, submission in enumerate(new_submissions, 1):
-            sub_id = submission.get("id")
-            title = submission.get("title", "Unknown")
-            timestamp = submission.get("timestamp")
-
-            time_str = ""
-            if timestamp:
-                dt = datetime.fromtimestamp(int(timestamp), tz=timezone(timedelta(hours=8)))
-                time_str = f" [{dt.strftime('%Y-%m-%d %H:%M')}]"
-
-            print(f"\n[{i}/{len(new_submissions)}] {title}{time_str} (ID: {sub_id})")
-
-            detail = self.get_submission_detail(sub_id)
-            if not detail:
-                failed_count += 1
-                time.sleep(1)
-                continue
+        time_str = ""
+        if timestamp:
+            dt = datetime.fromtimestamp(int(timestamp), tz=BEIJING_TZ)
+            time_str = f" [{dt.strftime('%Y-%m-%d %H:%M')}]"
 
-            code = detail.get("code", "")
-            if not self.has_valid_comment(code):
-                print("  ⊘ 跳过：没有符合格式的目录结构注释")
-                skipped_count += 1
+        print(f"\n[{index}/{total}] {title}{time_str} (ID: {sub_id})", file=self._out)
 
-                # 仍然标记为已处理，避免下次重复刷屏
-                self.synced_ids.add(str(sub_id))
+        if not detail:
+            return "failed"
 
-                if i % 10 == 0:
-                    self.save_synced_ids()
-
-                time.sleep(0.5)
-                continue
-
-            if self.save_submission(submission, detail):
-                self.synced_ids.add(str(sub_id))
-                success_count += 1
-            else:
-                failed_count += 1
+        code = detail.get("code", "")
+        directories, filename = self.parse_comment(code)
+        if not directories or not filename:
+            print("  ⊘ 跳过：没有符合格式的目录结构注释", file=self._out)
 
-            if i % 10 == 0:
-                self.save_synced_ids()
+            # 仍然标记为已处理，避免下次重复刷屏
+            self.mark_synced(sub_id)
+            return "skipped"
 
-            time.sleep(1)
+        if self.save_submission(submission, detail, directories, filename):
+            self.mark_synced(sub_id)
+            return "success"
+        return "failed"
 
-        # 保存同步状态
-        self.save_synced_ids()
+    def sync(self) -> bool:
+        """执行同步：拉取提交 -> 校验注释 -> 写文件 -> 生成 README"""
+        print("=" * 60)
+        print("🚀 开始同步 LeetCode 提交记录")
+        print("=" * 60)
 
-        # 更新 README
-        self.update_all_category_readmes()
-        self.generate_main_readme()
+        # 分页与详情拉取流水线化：每拿到一页就把其中的新提交交给线程池拉详情，
+        # 后续分页的等待时间被详情请求覆盖；解析与写文件仍在主线程按列表顺序串行执行
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                futures: Dict[Future, Dict] = {}
+                total_count = 0
+
+                for page_subs in self.iter_ac_submissions():
+                    total_count += len(page_subs)
+                    for sub in page_subs:
+                        if sub["_id_str"] not in self.synced_ids:
+                            futures[executor.submit(self.get_submission_detail, sub["_id_str"])] = sub
+
+                if not total_count:
+                    if not self.listing_not_modified:
+                        print("📭 没有找到 AC 提交记录")
+                    return False
+
+                if not futures:
+                    print("✨ 没有新的提交需要同步")
+                    if self.pending_failures and self.listing_complete:
+                        # 完整拉过一遍列表也没有待同步的提交：上次遗留的失败已不存在，清除标记
+                        self.pending_failures = False
+                        self.save_synced_ids()
+                    return False
+
+                new_count = len(futures)
+                print(f"\n📦 共 {new_count} 条新提交，开始检查...")
+                print("-" * 60)
+
+                counts: Dict[str, int] = defaultdict(int)
+                # 列表按时间从新到旧：倒序处理，保证同一题的多次提交中最新的一份最后写入
+                for i, (future, submission) in enumerate(reversed(list(futures.items())), 1):
+                    # 单条提交的多行状态输出显式写入缓冲（print(..., file=self._out)），处理完后一次性写到 stdout；
+                    # 不替换全局 sys.stdout，线程池里的输出不会混进缓冲
+                    buf = io.StringIO()
+                    self._out = buf
+                    try:
+                        result = self._process_submission(i, new_count, submission, future.result())
+                    finally:
+                        self._out = None
+                        sys.stdout.write(buf.getvalue())
+                    counts[result] += 1
+            except BaseException:
+                # 分页或处理中途出错 / 被中断：已处理的 ID 照常落盘，但不推进上次同步时间；
+                # 排队中的详情请求直接取消，不必等它们逐个过完限流器再退出
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.close_sync_log()
+                raise
+
+        # 列表完整且没有失败的提交时才记下新 ETag；否则下次仍需完整分页重试
+        all_synced = self.listing_complete and not counts["failed"]
+        if all_synced:
+            self.listing_etag = self.fetched_etag
+        self.pending_failures = not all_synced
+
+        # 保存同步状态：列表没拉完整或有提交失败时不推进上次同步时间，否则这些提交会永久落在截止点之前
+        if not self.listing_complete:
+            print("\n⚠️  提交列表未完整获取，本次不更新上次同步时间")
+        elif counts["failed"]:
+            print("\n⚠️  有提交同步失败，本次不更新上次同步时间")
+        self.save_synced_ids(advance_last_sync=all_synced)
+
+        # 更新 README：只遍历一次目录树，分类 README 与主 README 共用扫描结果；
+        # 分类 README 只为本次有变动的目录重新生成
+        tree = self._scan_tree()
+        self.update_all_category_readmes(tree, only=self.touched_dirs)
+        self.generate_main_readme(tree)
 
         print("\n" + "=" * 60)
         print("🎉 同步完成！")
-        print(f"  ✅ 成功保存: {success_count}")
-        print(f"  ⊘ 跳过（无注释）: {skipped_count}")
-        print(f"  ❌ 失败: {failed_count}")
-        print(f"  📊 总计: {len(new_submissions)}")
+        print(f"  ✅ 成功保存: {counts['success']}")
+        print(f"  ⊘ 跳过（无注释）: {counts['skipped']}")
+        print(f"  ❌ 失败: {counts['failed']}")
+        print(f"  📊 总计: {new_count}")
 
         if self.new_problems:
             print(f"\n🆕 本次新增 {len(self.new_problems)} 道题目:")
@@ -853,7 +1135,7 @@ class LeetCodeSyncer:
 
         print("=" * 60)
 
-        return success_count > 0
+        return counts["success"] > 0
 
 
 def main():
@@ -868,6 +1150,7 @@ def main():
   python sync.py --after "2026-01-26 23:47"
   python sync.py --debug
   python sync.py --force
+  python sync.py --workers 4
 
 注释格式要求:
 // 一级目录
@@ -882,10 +1165,11 @@ def main():
     parser.add_argument("--after", type=str, help='只同步此时间之后的提交，格式: "2026-01-26 23:47" (北京时间)')
     parser.add_argument("--debug", action="store_true", help="调试模式：显示详细的匹配信息")
     parser.add_argument("--force", action="store_true", help="强制重新同步所有提交（忽略已同步记录）")
+    parser.add_argument("--workers", type=int, default=DETAIL_WORKERS, help=f"并发拉取提交详情的线程数（默认 {DETAIL_WORKERS}）")
     args = parser.parse_args()
 
     try:
-        syncer = LeetCodeSyncer(sync_after=args.after, debug=args.debug)
+        syncer = LeetCodeSyncer(sync_after=args.after, debug=args.debug, workers=args.workers)
 
         if args.force:
             print("⚠️  强制模式：将重新同步所有提交")